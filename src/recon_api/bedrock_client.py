@@ -1,7 +1,10 @@
-import json
+import atexit
+from functools import lru_cache
 
 import boto3
+from botocore.config import Config
 import httpx
+import orjson
 
 from .settings import settings
 
@@ -15,37 +18,46 @@ SYSTEM_PROMPT = (
     'Use sections: Summary, Wallet Graph, Behavior, Risk Flags, Actionable Next Steps.'
 )
 
+# Keep-alive pool for bearer-token calls to bedrock-runtime.
+_BEDROCK_HTTP = httpx.Client(
+    timeout=60,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+    http2=True,
+)
+atexit.register(_BEDROCK_HTTP.close)
+
 
-def _invoke_bedrock_boto3(body: dict) -> dict:
-    client = boto3.client(
+@lru_cache(maxsize=1)
+def _bedrock_client():
+    # boto3 clients are thread-safe; build one (service model, endpoint
+    # resolver, connection pool) and share it across requests.
+    return boto3.client(
         'bedrock-runtime',
         region_name=settings.aws_region,
         aws_access_key_id=settings.aws_access_key_id,
         aws_secret_access_key=settings.aws_secret_access_key,
         aws_session_token=settings.aws_session_token,
+        config=Config(max_pool_connections=50, retries={'max_attempts': 2, 'mode': 'standard'}),
     )
-    response = client.invoke_model(
+
+
+def _invoke_bedrock_boto3(body_bytes: bytes) -> dict:
+    response = _bedrock_client().invoke_model(
         modelId=settings.bedrock_model_id,
         contentType='application/json',
         accept='application/json',
-        body=json.dumps(body),
+        body=body_bytes,
     )
-    return json.loads(response['body'].read())
+    return orjson.loads(response['body'].read())
 
 
 def _should_fallback_to_boto3(response: httpx.Response) -> bool:
+    if response.status_code in (401, 403):
+        return True
     if response.status_code < 400:
         return False
-    try:
-        text = response.text
-    except Exception:
-        text = ''
-    markers = (
-        'AccessDeniedException',
-        'CallWithBearerToken',
-        'not authorized',
-    )
-    return any(marker in text for marker in markers)
+    # AWS REST errors name the error type in a header; no need to decode the body.
+    return response.headers.get('x-amzn-errortype', '').startswith('AccessDeniedException')
 
 
 def _has_aws_creds() -> bool:
@@ -79,15 +91,16 @@ def analyze_wallet_with_bedrock(
         'messages': [
             {
                 'role': 'user',
-                'content': [{'type': 'text', 'text': json.dumps(user_prompt)}],
+                'content': [{'type': 'text', 'text': orjson.dumps(user_prompt).decode()}],
             }
         ],
     }
+    body_bytes = orjson.dumps(body)
 
     # Prefer normal AWS credential auth when available; bearer-token auth
     # often lacks bedrock:CallWithBearerToken permission in workshop roles.
     if _has_aws_creds():
-        payload = _invoke_bedrock_boto3(body)
+        payload = _invoke_bedrock_boto3(body_bytes)
     elif settings.bedrock_api_key:
         endpoint = (
             f'https://bedrock-runtime.{settings.aws_region}.amazonaws.com/'
@@ -98,15 +111,15 @@ def analyze_wallet_with_bedrock(
             'Content-Type': 'application/json',
             'Accept': 'application/json',
         }
-        with httpx.Client(timeout=60) as client:
-            response = client.post(endpoint, headers=headers, content=json.dumps(body))
-            if _should_fallback_to_boto3(response):
-                payload = _invoke_bedrock_boto3(body)
-            else:
-                response.raise_for_status()
-                payload = response.json()
+        response = _BEDROCK_HTTP.post(endpoint, headers=headers, content=body_bytes)
+        if _should_fallback_to_boto3(response):
+            payload = _invoke_bedrock_boto3(body_bytes)
+        else:
+            response.raise_for_status()
+            payload = orjson.loads(response.content)
     else:
-        payload = _invoke_bedrock_boto3(body)
+        payload = _invoke_bedrock_boto3(body_bytes)
 
-    text = ''.join(chunk.get('text', '') for chunk in payload.get('content', []))
+    content = payload.get('content') or ()
+    text = ''.join([chunk['text'] for chunk in content if chunk.get('type') == 'text'])
     return text.strip(), settings.bedrock_model_id
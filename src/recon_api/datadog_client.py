@@ -1,11 +1,115 @@
-from datetime import UTC, datetime
+import atexit
+import gzip
+from queue import Empty, Full, Queue
+from threading import Thread
+import time
 from typing import Any
 
 import httpx
+import orjson
 
 from .schemas import TraceStep
 from .settings import settings
 
+_DD_URL = f'https://http-intake.logs.{settings.dd_site}/api/v2/logs'
+_DD_TAGS = f'env:{settings.dd_env},version:{settings.dd_version}'
+_DD_SERVICE = settings.dd_service
+_DD_SEND = settings.dd_send_logs
+_DD_KEY = settings.dd_api_key
+
+# Shared keep-alive pool so log posts reuse the TLS connection to the intake.
+_DD_CLIENT = (
+    httpx.Client(
+        timeout=settings.recon_timeout_seconds,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=40, keepalive_expiry=30.0),
+        http2=True,
+        headers={'Content-Type': 'application/json'},
+    )
+    if _DD_KEY
+    else None
+)
+
+# Wallet run logs are queued and shipped in batches off the request path.
+# Intake accepts up to 1000 entries per array; stay under that.
+_LOG_QUEUE: Queue[dict[str, Any]] = Queue(maxsize=10_000)
+_LOG_BATCH_MAX = 900
+_LOG_FLUSH_INTERVAL_S = 2.0
+_dropped_logs = 0
+
+
+def _post_logs(batch: list[dict[str, Any]]) -> None:
+    body = gzip.compress(orjson.dumps(batch), compresslevel=6)
+    headers = {'DD-API-KEY': _DD_KEY, 'Content-Encoding': 'gzip'}
+    resp = _DD_CLIENT.post(_DD_URL, headers=headers, content=body)
+    resp.raise_for_status()
+
+
+# Queued by the exit hook to wake the flusher and have it send what it holds.
+_STOP_FLUSHER: dict[str, Any] = {}
+_FLUSHER_JOIN_TIMEOUT_S = 5.0
+
+
+def _drain(batch: list[dict[str, Any]], deadline: float | None = None) -> bool:
+    # Returns True once the stop sentinel has been taken off the queue.
+    while len(batch) < _LOG_BATCH_MAX:
+        try:
+            if deadline is None:
+                item = _LOG_QUEUE.get_nowait()
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                item = _LOG_QUEUE.get(timeout=remaining)
+        except Empty:
+            break
+        if item is _STOP_FLUSHER:
+            return True
+        batch.append(item)
+    return False
+
+
+def _send_batch(batch: list[dict[str, Any]]) -> None:
+    global _dropped_logs
+    try:
+        _post_logs(batch)
+    except Exception:
+        _dropped_logs += len(batch)
+
+
+def _flusher() -> None:
+    stopping = False
+    while not stopping:
+        item = _LOG_QUEUE.get()
+        if item is _STOP_FLUSHER:
+            break
+        batch = [item]
+        stopping = _drain(batch, deadline=time.monotonic() + _LOG_FLUSH_INTERVAL_S)
+        _send_batch(batch)
+    # Stopping: ship whatever is still queued without waiting for more.
+    while True:
+        batch: list[dict[str, Any]] = []
+        _drain(batch)
+        if not batch:
+            break
+        _send_batch(batch)
+
+
+def _stop_flusher(thread: Thread) -> None:
+    try:
+        _LOG_QUEUE.put(_STOP_FLUSHER, timeout=_FLUSHER_JOIN_TIMEOUT_S)
+    except Full:
+        pass
+    thread.join(timeout=_FLUSHER_JOIN_TIMEOUT_S)
+
+
+if _DD_CLIENT is not None:
+    atexit.register(_DD_CLIENT.close)
+    if _DD_SEND:
+        _flusher_thread = Thread(target=_flusher, name='recon-dd-flusher', daemon=True)
+        _flusher_thread.start()
+        # Registered after close, so it runs first (atexit is LIFO).
+        atexit.register(_stop_flusher, _flusher_thread)
+
 
 def send_wallet_trace_log(
     wallet: str,
@@ -13,27 +117,27 @@ def send_wallet_trace_log(
     metrics: dict[str, Any],
     social_count: int,
 ) -> None:
-    if not settings.dd_api_key or not settings.dd_send_logs:
+    global _dropped_logs
+    if _DD_CLIENT is None or not _DD_SEND:
         return
 
-    url = f'https://http-intake.logs.{settings.dd_site}/api/v2/logs'
     payload = {
         'ddsource': 'python',
-        'service': settings.dd_service,
-        'ddtags': f'env:{settings.dd_env},version:{settings.dd_version}',
+        'service': _DD_SERVICE,
+        'ddtags': _DD_TAGS,
         'hostname': 'recon-api',
-        'timestamp': datetime.now(UTC).isoformat(),
+        'timestamp': time.time_ns() // 1_000_000,
         'message': 'wallet_report_completed',
         'wallet': wallet,
         'trace': [step.model_dump() for step in trace],
         'metrics': metrics,
         'social_results': social_count,
     }
-    headers = {'Content-Type': 'application/json', 'DD-API-KEY': settings.dd_api_key}
 
-    with httpx.Client(timeout=settings.recon_timeout_seconds) as client:
-        resp = client.post(url, headers=headers, json=[payload])
-        resp.raise_for_status()
+    try:
+        _LOG_QUEUE.put_nowait(payload)
+    except Full:
+        _dropped_logs += 1
 
 
 def datadog_config_summary() -> dict[str, Any]:
@@ -45,26 +149,25 @@ def datadog_config_summary() -> dict[str, Any]:
         'dd_env': settings.dd_env,
         'dd_version': settings.dd_version,
         'dd_api_key_present': bool(settings.dd_api_key),
+        'dd_log_queue_depth': _LOG_QUEUE.qsize(),
+        'dd_logs_dropped': _dropped_logs,
     }
 
 
 def send_test_log(message: str = 'recon_datadog_test_log') -> None:
-    if not settings.dd_api_key:
+    if _DD_CLIENT is None:
         raise RuntimeError('DD_API_KEY is missing')
-    if not settings.dd_send_logs:
+    if not _DD_SEND:
         raise RuntimeError('DD_SEND_LOGS is false')
 
-    url = f'https://http-intake.logs.{settings.dd_site}/api/v2/logs'
     payload = {
         'ddsource': 'python',
-        'service': settings.dd_service,
-        'ddtags': f'env:{settings.dd_env},version:{settings.dd_version},kind:test',
+        'service': _DD_SERVICE,
+        'ddtags': f'{_DD_TAGS},kind:test',
         'hostname': 'recon-api',
-        'timestamp': datetime.now(UTC).isoformat(),
+        'timestamp': time.time_ns() // 1_000_000,
         'message': message,
     }
-    headers = {'Content-Type': 'application/json', 'DD-API-KEY': settings.dd_api_key}
 
-    with httpx.Client(timeout=settings.recon_timeout_seconds) as client:
-        resp = client.post(url, headers=headers, json=[payload])
-        resp.raise_for_status()
+    # Sent synchronously so the debug endpoint can report intake errors.
+    _post_logs([payload])
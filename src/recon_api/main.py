@@ -1,12 +1,13 @@
-import json
-from collections.abc import Callable, Generator
+import asyncio
+from collections.abc import AsyncGenerator, Callable
 from pathlib import Path
-from queue import Queue
-from threading import Thread
+import re
 from uuid import uuid4
 
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import orjson
 from pydantic import ValidationError
 
 from .bedrock_client import analyze_wallet_with_bedrock
@@ -14,8 +15,12 @@ from .datadog_client import datadog_config_summary, send_test_log, send_wallet_t
 from .observability import TraceCollector
 from .schemas import (
     SocialIntel,
+    WalletEntityInference,
+    WalletFundingEdge,
     WalletIntelligence,
+    WalletKnownLabel,
     WalletMetrics,
+    WalletProgramUsage,
     WalletReportRequest,
     WalletReportResponse,
 )
@@ -26,13 +31,11 @@ from .x_client import XSearchError, search_x_mentions
 app = FastAPI(title='recon API', version='0.1.0')
 EventCallback = Callable[[str, dict | None], None]
 STATIC_DIR = Path(__file__).parent / 'static'
+B58_WALLET_RE = re.compile(r'[1-9A-HJ-NP-Za-km-z]{32,44}')
 
 
 def _looks_like_solana_wallet(value: str) -> bool:
-    if len(value) < 32 or len(value) > 44:
-        return False
-    allowed = set('123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz')
-    return all(ch in allowed for ch in value)
+    return B58_WALLET_RE.fullmatch(value) is not None
 
 
 @app.get('/health')
@@ -69,6 +72,25 @@ def _emit(on_event: EventCallback | None, event: str, data: dict | None = None)
         on_event(event, data or {})
 
 
+def _construct_intelligence(data: dict) -> WalletIntelligence:
+    # collect_wallet_report_data builds these dicts itself, so skip
+    # validation; nested lists still need to become models.
+    return WalletIntelligence.model_construct(
+        **{
+            **data,
+            'likely_funders': [WalletFundingEdge.model_construct(**e) for e in data['likely_funders']],
+            'likely_funded_wallets': [
+                WalletFundingEdge.model_construct(**e) for e in data['likely_funded_wallets']
+            ],
+            'frequent_programs': [WalletProgramUsage.model_construct(**p) for p in data['frequent_programs']],
+            'known_labels': [WalletKnownLabel.model_construct(**l) for l in data['known_labels']],
+            'inferred_entities': [
+                WalletEntityInference.model_construct(**e) for e in data['inferred_entities']
+            ],
+        }
+    )
+
+
 def _build_wallet_report(
     payload: WalletReportRequest, on_event: EventCallback | None = None
 ) -> WalletReportResponse:
@@ -96,8 +118,8 @@ def _build_wallet_report(
                 max_signatures=max_signatures,
                 timeout_s=settings.recon_timeout_seconds,
             )
-        metrics = WalletMetrics.model_validate(metrics_dict)
-        intelligence = WalletIntelligence.model_validate(intelligence_dict)
+        metrics = WalletMetrics.model_construct(**metrics_dict)
+        intelligence = _construct_intelligence(intelligence_dict)
         _emit(
             on_event,
             'step_completed',
@@ -146,6 +168,7 @@ def _build_wallet_report(
                     query_terms=query_terms,
                     timeout_s=settings.recon_timeout_seconds,
                     max_results=settings.x_max_results,
+                    deadline_s=settings.recon_timeout_seconds,
                 )
             _emit(
                 on_event,
@@ -156,6 +179,19 @@ def _build_wallet_report(
                     'total_results': social.total_results if social else 0,
                 },
             )
+        except TimeoutError:
+            social = SocialIntel(query_terms=[], total_results=0, mentions=[])
+            _emit(
+                on_event,
+                'step_failed',
+                {
+                    'step': 'x_search',
+                    'detail': (
+                        f'X search exceeded {settings.recon_timeout_seconds}s; '
+                        'continuing without social enrichment'
+                    ),
+                },
+            )
         except XSearchError as exc:
             social = SocialIntel(query_terms=[], total_results=0, mentions=[])
             _emit(
@@ -184,57 +220,37 @@ def _build_wallet_report(
             {'step': 'x_search', 'detail': 'x search disabled or token missing'},
         )
 
+    metrics_dump = metrics.model_dump()
     if settings.recon_metrics_only:
-        response = WalletReportResponse(
-            metrics=metrics,
-            intelligence=intelligence,
-            social=social,
-            analysis='Metrics-only mode enabled. Bedrock analysis skipped.',
-            model=None,
-            trace=trace.as_list(),
-        )
+        analysis = 'Metrics-only mode enabled. Bedrock analysis skipped.'
+        model = None
         _emit(
             on_event,
             'step_skipped',
             {'step': 'bedrock_analysis', 'detail': 'metrics-only mode enabled'},
         )
+    else:
         try:
-            send_wallet_trace_log(
-                wallet=payload.wallet,
-                trace=response.trace,
-                metrics=metrics.model_dump(),
-                social_count=social.total_results if social else 0,
+            _emit(on_event, 'step_started', {'step': 'bedrock_analysis'})
+            with trace.step('bedrock_analysis'):
+                analysis, model = analyze_wallet_with_bedrock(
+                    wallet=payload.wallet,
+                    metrics=metrics_dump,
+                    intelligence=intelligence.model_dump(),
+                    social=social.model_dump() if social else None,
+                )
+            _emit(
+                on_event,
+                'step_completed',
+                {'step': 'bedrock_analysis', 'model': settings.bedrock_model_id},
             )
-        except Exception:
-            pass
-        _emit(
-            on_event,
-            'completed',
-            {'response': response.model_dump(mode='json')},
-        )
-        return response
-
-    try:
-        _emit(on_event, 'step_started', {'step': 'bedrock_analysis'})
-        with trace.step('bedrock_analysis'):
-            analysis, model = analyze_wallet_with_bedrock(
-                wallet=payload.wallet,
-                metrics=metrics.model_dump(),
-                intelligence=intelligence.model_dump(),
-                social=social.model_dump() if social else None,
+        except Exception as exc:
+            _emit(
+                on_event,
+                'error',
+                {'step': 'bedrock_analysis', 'status_code': 502, 'detail': f'Bedrock request failed: {exc}'},
             )
-        _emit(
-            on_event,
-            'step_completed',
-            {'step': 'bedrock_analysis', 'model': settings.bedrock_model_id},
-        )
-    except Exception as exc:
-        _emit(
-            on_event,
-            'error',
-            {'step': 'bedrock_analysis', 'status_code': 502, 'detail': f'Bedrock request failed: {exc}'},
-        )
-        raise HTTPException(status_code=502, detail=f'Bedrock request failed: {exc}') from exc
+            raise HTTPException(status_code=502, detail=f'Bedrock request failed: {exc}') from exc
 
     response = WalletReportResponse(
         metrics=metrics,
@@ -248,16 +264,20 @@ def _build_wallet_report(
         send_wallet_trace_log(
             wallet=payload.wallet,
             trace=response.trace,
-            metrics=metrics.model_dump(),
+            metrics=metrics_dump,
             social_count=social.total_results if social else 0,
         )
     except Exception:
         pass
-    _emit(
-        on_event,
-        'completed',
-        {'response': response.model_dump(mode='json')},
-    )
+    # Only the stream needs the serialized report; the JSON endpoint lets
+    # FastAPI serialize the response model itself. The report is encoded to
+    # JSON once and embedded verbatim in the SSE frame.
+    if on_event:
+        _emit(
+            on_event,
+            'completed',
+            {'response': orjson.Fragment(response.model_dump_json())},
+        )
     return response
 
 
@@ -266,38 +286,42 @@ def wallet_report(payload: WalletReportRequest) -> WalletReportResponse:
     return _build_wallet_report(payload)
 
 
-def _format_sse(event: str, data: dict) -> str:
-    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+def _format_sse(event: str, data: dict) -> bytes:
+    return b'event: ' + event.encode() + b'\ndata: ' + orjson.dumps(data) + b'\n\n'
 
 
 @app.post('/v1/wallet/report/stream')
-def wallet_report_stream(payload: WalletReportRequest) -> StreamingResponse:
+async def wallet_report_stream(payload: WalletReportRequest) -> StreamingResponse:
     request_id = str(uuid4())
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[dict | None] = asyncio.Queue()
 
-    def event_stream() -> Generator[str, None, None]:
-        queue: Queue[dict | None] = Queue()
-
-        def on_event(event: str, data: dict | None) -> None:
-            queue.put({'event': event, 'data': data or {}})
-
-        def worker() -> None:
-            try:
-                _build_wallet_report(payload, on_event=on_event)
-            except HTTPException as exc:
-                on_event('error', {'status_code': exc.status_code, 'detail': exc.detail})
-            except Exception as exc:
-                on_event('error', {'status_code': 500, 'detail': str(exc)})
-            finally:
-                queue.put(None)
-
-        Thread(target=worker, daemon=True).start()
+    def on_event(event: str, data: dict | None) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, {'event': event, 'data': data or {}})
 
+    def worker() -> None:
+        try:
+            _build_wallet_report(payload, on_event=on_event)
+        except HTTPException as exc:
+            on_event('error', {'status_code': exc.status_code, 'detail': exc.detail})
+        except Exception as exc:
+            on_event('error', {'status_code': 500, 'detail': str(exc)})
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    async def event_stream() -> AsyncGenerator[bytes, None]:
+        # The report pipeline is blocking I/O; run it off the event loop and
+        # only hold a thread for the build itself, not the whole stream. Uses
+        # the same anyio threadpool (and limit) as the sync JSON endpoint,
+        # not asyncio's smaller default executor.
+        task = asyncio.create_task(run_in_threadpool(worker))
         while True:
-            item = queue.get()
+            item = await queue.get()
             if item is None:
                 break
             frame = {'request_id': request_id, **item['data']}
             yield _format_sse(item['event'], frame)
+        await task
 
     return StreamingResponse(
         event_stream(),
@@ -1,13 +1,23 @@
 from contextlib import contextmanager
-import time
+from time import perf_counter_ns
 from urllib.parse import urlparse
 
 from .schemas import TraceStep
 from .settings import settings
 
+_DD_SERVICE = settings.dd_service
+_DD_ENV = settings.dd_env
+_DD_VERSION = settings.dd_version
+
 if settings.dd_trace_enabled:
     try:
-        from ddtrace import tracer
+        from ddtrace import config as dd_config, tracer
+
+        # ddtrace stamps env/version on every span it creates from its global
+        # config, so span tagging below only adds per-step tags.
+        dd_config.service = _DD_SERVICE
+        dd_config.env = _DD_ENV
+        dd_config.version = _DD_VERSION
         if settings.dd_trace_agent_url:
             parsed = urlparse(settings.dd_trace_agent_url)
             if parsed.scheme in {'http', 'https'} and parsed.hostname:
@@ -28,20 +38,26 @@ class TraceCollector:
     def __init__(self) -> None:
         self.steps: list[TraceStep] = []
 
-    @contextmanager
-    def step(self, name: str, detail: str | None = None):
-        started = time.perf_counter()
-        dd_span = None
-        if tracer is not None:
-            dd_span = tracer.trace(
-                f'recon.{name}',
-                service=settings.dd_service,
-                resource=name,
+    def _record(self, name: str, started_ns: int, ok: bool, detail: str | None) -> None:
+        self.steps.append(
+            TraceStep.model_construct(
+                step=name,
+                duration_ms=(perf_counter_ns() - started_ns) // 1_000_000,
+                ok=ok,
+                detail=detail,
             )
-            dd_span.set_tag('env', settings.dd_env)
-            dd_span.set_tag('version', settings.dd_version)
-            if detail:
-                dd_span.set_tag('detail', detail)
+        )
+
+    @contextmanager
+    def _traced_step(self, name: str, detail: str | None = None):
+        started_ns = perf_counter_ns()
+        dd_span = tracer.trace(
+            f'recon.{name}',
+            service=_DD_SERVICE,
+            resource=name,
+        )
+        if detail:
+            dd_span.set_tag('detail', detail)
         ok = True
         err_msg = None
         try:
@@ -49,22 +65,29 @@ class TraceCollector:
         except Exception as exc:
             ok = False
             err_msg = str(exc)
-            if dd_span is not None:
-                dd_span.set_tag('error', 1)
-                dd_span.set_tag('error.msg', err_msg)
+            dd_span.set_tags({'error': 1, 'error.msg': err_msg})
             raise
         finally:
-            duration_ms = int((time.perf_counter() - started) * 1000)
-            self.steps.append(
-                TraceStep(
-                    step=name,
-                    duration_ms=duration_ms,
-                    ok=ok,
-                    detail=detail if ok else err_msg,
-                )
-            )
-            if dd_span is not None:
-                dd_span.finish()
+            self._record(name, started_ns, ok, detail if ok else err_msg)
+            dd_span.finish()
+
+    @contextmanager
+    def _untraced_step(self, name: str, detail: str | None = None):
+        started_ns = perf_counter_ns()
+        ok = True
+        err_msg = None
+        try:
+            yield
+        except Exception as exc:
+            ok = False
+            err_msg = str(exc)
+            raise
+        finally:
+            self._record(name, started_ns, ok, detail if ok else err_msg)
+
+    # Steps are always collected (they are returned in the report), but span
+    # bookkeeping is only wired in when a tracer is configured.
+    step = _untraced_step if tracer is None else _traced_step
 
     def as_list(self) -> list[TraceStep]:
         return self.steps
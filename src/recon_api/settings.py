@@ -18,6 +18,10 @@ class Settings(BaseSettings):
     )
     solana_rpc_url: str = Field(default='https://api.mainnet-beta.solana.com', alias='SOLANA_RPC_URL')
     solana_signature_limit: int = Field(default=50, alias='SOLANA_SIGNATURE_LIMIT')
+    solana_two_pass_fetch: bool = Field(default=False, alias='SOLANA_TWO_PASS_FETCH')
+    recon_tx_cache_path: str | None = Field(
+        default='.recon_cache/tx.sqlite3', alias='RECON_TX_CACHE_PATH'
+    )
     recon_timeout_seconds: int = Field(default=25, alias='RECON_TIMEOUT_SECONDS')
     recon_metrics_only: bool = Field(default=False, alias='RECON_METRICS_ONLY')
     x_bearer_token: str | None = Field(default=None, alias='X_BEARER_TOKEN')
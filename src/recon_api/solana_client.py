@@ -1,9 +1,26 @@
-from collections import Counter
+from array import array
+import asyncio
+import atexit
+from collections import Counter, defaultdict
+from collections.abc import AsyncIterator, Coroutine
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime
+from heapq import nlargest
+from operator import itemgetter
+from pathlib import Path
+import random
+import sqlite3
+from threading import Lock, Thread
 import time
-from typing import Any
+from typing import Any, TypeVar
 
 import httpx
+import orjson
+
+from .settings import settings
+
+_T = TypeVar('_T')
+_count = itemgetter(1)
 
 LAMPORTS_PER_SOL = 1_000_000_000
 KNOWN_ADDRESS_LABELS: dict[str, tuple[str, str]] = {
@@ -11,6 +28,50 @@ KNOWN_ADDRESS_LABELS: dict[str, tuple[str, str]] = {
     'FLASHX8DrLbgeR8FcfNV1F5krxYcYMUdBkrP1EPBtxB9': ('Axiom execution/flash program', 'axiom'),
     '6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P': ('Pump.fun program', 'pumpfun'),
 }
+_KNOWN_ADDRESSES = frozenset(KNOWN_ADDRESS_LABELS)
+
+# Bits in the per-counterparty directions column.
+_INBOUND = 1
+_OUTBOUND = 2
+
+
+# Sizes getTransaction batches from an EWMA of per-transaction latency, aiming
+# for batches that take about target_ns end to end: slow providers drift toward
+# single lookups, fast ones toward larger batches.
+class _BatchSizeTracker:
+    def __init__(
+        self,
+        target_ns: int = 500_000_000,
+        weight: float = 0.05,
+        min_size: int = 1,
+        max_size: int = 50,
+    ) -> None:
+        self.target_ns = target_ns
+        self.weight = weight
+        self.min_size = min_size
+        self.max_size = max_size
+        self.ns_per_request: float | None = None
+
+    def record(self, requests: int, elapsed_ns: int) -> None:
+        sample = elapsed_ns / requests
+        if self.ns_per_request is None:
+            self.ns_per_request = sample
+        else:
+            self.ns_per_request += self.weight * (sample - self.ns_per_request)
+
+    def get_size(self) -> int:
+        if not self.ns_per_request:
+            return self.min_size
+        return max(self.min_size, min(self.max_size, int(self.target_ns / self.ns_per_request)))
+
+
+# Signatures are paged so transaction lookups can start on the first page.
+_SIGNATURE_PAGE_SIZE = 100
+# In-flight getTransaction requests per report, shared across pages.
+_TX_CONCURRENCY = 16
+
+# One tracker per RPC endpoint, kept across reports so tuning carries over.
+_BATCH_TRACKERS: dict[str, _BatchSizeTracker] = {}
 
 
 class SolanaRPCError(RuntimeError):
@@ -21,208 +82,590 @@ class SolanaRateLimitError(SolanaRPCError):
     pass
 
 
-def _rpc(client: httpx.Client, url: str, method: str, params: list[Any]) -> Any:
-    payload = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}
+# Monotonic time before which no new request goes to an endpoint that just
+# answered 429, so concurrent lookups back off together instead of retrying
+# into the same limit.
+_COOLDOWN_UNTIL: dict[str, float] = {}
+
+# Circuit breaker: once this many calls to an endpoint have used up all their
+# 429 retries within _BREAKER_WINDOW_S, further calls fail fast for
+# _BREAKER_OPEN_S. Only exhausted calls count, so a short burst of 429s is left
+# to the cooldown and backoff above.
+_BREAKER_THRESHOLD = 3
+_BREAKER_WINDOW_S = 30.0
+_BREAKER_OPEN_S = 5.0
+_RATE_LIMIT_FAILURES: dict[str, list[float]] = {}
+_BREAKER_OPEN_UNTIL: dict[str, float] = {}
+
+
+def _record_rate_limit_failure(url: str) -> None:
+    now = time.monotonic()
+    failures = [t for t in _RATE_LIMIT_FAILURES.get(url, ()) if t > now - _BREAKER_WINDOW_S]
+    failures.append(now)
+    if len(failures) >= _BREAKER_THRESHOLD:
+        _BREAKER_OPEN_UNTIL[url] = now + _BREAKER_OPEN_S
+        failures.clear()
+    _RATE_LIMIT_FAILURES[url] = failures
+
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+def _backoff_delay(base_s: float, attempt: int) -> float:
+    return min(8.0, base_s * 2**attempt) + random.uniform(0, 0.2)
+
+
+async def _wait_for_cooldown(url: str) -> None:
+    remaining = _COOLDOWN_UNTIL.get(url, 0.0) - time.monotonic()
+    if remaining > 0:
+        await asyncio.sleep(remaining)
+
+
+async def _post_json(client: httpx.AsyncClient, url: str, payload: Any) -> Any:
+    # Retries 429s and transport errors; other HTTP errors go to the caller.
+    body = orjson.dumps(payload)
     last_error: Exception | None = None
     for attempt in range(4):
+        await _wait_for_cooldown(url)
+        if time.monotonic() < _BREAKER_OPEN_UNTIL.get(url, 0.0):
+            raise SolanaRateLimitError('Solana RPC rate limited (circuit open, retry shortly)')
         try:
-            response = client.post(url, json=payload)
+            response = await client.post(url, content=body, headers=_JSON_HEADERS)
             response.raise_for_status()
-            data = response.json()
-            if data.get('error'):
-                raise SolanaRPCError(str(data['error']))
-            return data.get('result')
+            _RATE_LIMIT_FAILURES.pop(url, None)
+            return orjson.loads(response.content)
         except httpx.HTTPStatusError as exc:
-            if exc.response.status_code == 429:
-                last_error = exc
-                if attempt < 3:
-                    time.sleep(0.6 * (attempt + 1))
-                    continue
-                raise SolanaRateLimitError('Solana RPC rate limited (HTTP 429)') from exc
-            raise SolanaRPCError(f'Solana RPC HTTP error: {exc.response.status_code}') from exc
+            if exc.response.status_code != 429:
+                raise
+            last_error = exc
+            if attempt < 3:
+                delay = _backoff_delay(0.7, attempt)
+                _COOLDOWN_UNTIL[url] = max(_COOLDOWN_UNTIL.get(url, 0.0), time.monotonic() + delay)
+                await asyncio.sleep(delay)
+                continue
+            _record_rate_limit_failure(url)
+            raise SolanaRateLimitError('Solana RPC rate limited (HTTP 429)') from exc
         except httpx.HTTPError as exc:
             last_error = exc
             if attempt < 3:
-                time.sleep(0.4 * (attempt + 1))
+                await asyncio.sleep(_backoff_delay(0.3, attempt))
                 continue
             raise SolanaRPCError(f'Solana RPC transport error: {exc}') from exc
     raise SolanaRPCError(f'Solana RPC failed: {last_error}')
 
 
-def _rpc_get_transactions_batch(
-    client: httpx.Client, url: str, signatures: list[str], batch_size: int = 12
+async def _rpc(client: httpx.AsyncClient, url: str, method: str, params: list[Any]) -> Any:
+    payload = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}
+    try:
+        data = await _post_json(client, url, payload)
+    except httpx.HTTPStatusError as exc:
+        raise SolanaRPCError(f'Solana RPC HTTP error: {exc.response.status_code}') from exc
+    if data.get('error'):
+        raise SolanaRPCError(str(data['error']))
+    return data.get('result')
+
+
+def _project_transaction(result: dict[str, Any] | None) -> dict[str, Any] | None:
+    # Keep only the fields the report reads; logs, inner instructions and token
+    # balances would otherwise stay alive for the whole aggregation pass.
+    if not isinstance(result, dict):
+        return result
+    message = (result.get('transaction') or {}).get('message') or {}
+    return {
+        'meta': {'fee': (result.get('meta') or {}).get('fee')},
+        'transaction': {
+            'message': {
+                'instructions': [
+                    {'parsed': ix['parsed']}
+                    for ix in message.get('instructions') or []
+                    if isinstance(ix.get('parsed'), dict)
+                ],
+                'accountKeys': message.get('accountKeys') or [],
+            }
+        },
+    }
+
+
+SYSTEM_PROGRAM_ID = '11111111111111111111111111111111'
+_PARSED_TX_OPTIONS = {'encoding': 'jsonParsed', 'maxSupportedTransactionVersion': 0}
+_RAW_TX_OPTIONS = {'encoding': 'json', 'maxSupportedTransactionVersion': 0}
+# Marks a raw-pass result that calls the System Program and so still needs a
+# jsonParsed fetch to read its transfers.
+_NEEDS_PARSE: dict[str, Any] = {}
+
+
+def _project_raw_transaction(result: dict[str, Any] | None) -> dict[str, Any] | None:
+    # Same shape as _project_transaction, built from the unparsed encoding. Only
+    # System Program instructions yield SOL transfers, so a transaction without
+    # them is complete with its fee and account keys alone.
+    if not isinstance(result, dict):
+        return result
+    message = (result.get('transaction') or {}).get('message') or {}
+    keys = message.get('accountKeys') or []
+    for ix in message.get('instructions') or []:
+        index = ix.get('programIdIndex')
+        if isinstance(index, int) and index < len(keys) and keys[index] == SYSTEM_PROGRAM_ID:
+            return _NEEDS_PARSE
+    meta = result.get('meta') or {}
+    loaded = meta.get('loadedAddresses') or {}
+    return {
+        'meta': {'fee': meta.get('fee')},
+        'transaction': {
+            'message': {
+                'instructions': [],
+                # jsonParsed lists lookup-table addresses after the static keys.
+                'accountKeys': [*keys, *(loaded.get('writable') or []), *(loaded.get('readonly') or [])],
+            }
+        },
+    }
+
+
+async def _rpc_get_transactions_chunk(
+    client: httpx.AsyncClient, url: str, chunk: list[str], parsed: bool = True
+) -> dict[str, dict[str, Any] | None]:
+    options = _PARSED_TX_OPTIONS if parsed else _RAW_TX_OPTIONS
+    project = _project_transaction if parsed else _project_raw_transaction
+    if len(chunk) == 1:
+        # Single lookups skip JSON-RPC batching, which some providers reject
+        # or throttle harder than plain requests.
+        sig = chunk[0]
+        return {sig: project(await _rpc(client, url, 'getTransaction', [sig, options]))}
+
+    results: dict[str, dict[str, Any] | None] = {}
+    payload = [
+        {
+            'jsonrpc': '2.0',
+            'id': idx,
+            'method': 'getTransaction',
+            'params': [sig, options],
+        }
+        for idx, sig in enumerate(chunk, start=1)
+    ]
+
+    try:
+        data = await _post_json(client, url, payload)
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code in (401, 403, 405, 415):
+            # Some providers/plans do not accept JSON-RPC batch payloads.
+            for sig in chunk:
+                results[sig] = project(await _rpc(client, url, 'getTransaction', [sig, options]))
+                await asyncio.sleep(0.08)
+            return results
+        raise SolanaRPCError(f'Solana RPC HTTP error: {exc.response.status_code}') from exc
+
+    if not isinstance(data, list):
+        raise SolanaRPCError('Unexpected batch response format')
+    # The spec lets batch responses arrive in any order; match them by id.
+    by_id = {item.get('id'): item for item in data if isinstance(item, dict)}
+    for idx, sig in enumerate(chunk, start=1):
+        item = by_id.get(idx)
+        if item and item.get('error'):
+            raise SolanaRPCError(str(item['error']))
+        results[sig] = project(item.get('result')) if item else None
+    return results
+
+
+# Finalized transactions never change, so their projected form is kept on disk
+# keyed by signature. All cache I/O runs on one dedicated thread, which owns the
+# connection, so a slow or locked database never stalls RPC traffic on _LOOP.
+_TX_CACHE_MAX_ROWS = 200_000
+# used_at only needs day-level precision for eviction, so hits on rows touched
+# within this window skip the write.
+_TX_CACHE_TOUCH_S = 86_400.0
+# Other workers may hold the write lock; give up quickly and treat it as a miss.
+_TX_CACHE_BUSY_TIMEOUT_S = 0.1
+_TX_CACHE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recon-tx-cache')
+_tx_cache: sqlite3.Connection | None = None
+_tx_cache_failed = False
+
+
+def _tx_cache_db() -> sqlite3.Connection | None:
+    global _tx_cache, _tx_cache_failed
+    if _tx_cache is not None or _tx_cache_failed or not settings.recon_tx_cache_path:
+        return _tx_cache
+    try:
+        path = Path(settings.recon_tx_cache_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(path, timeout=_TX_CACHE_BUSY_TIMEOUT_S)
+    except (OSError, sqlite3.Error):
+        # A cache that cannot be opened just means every lookup hits the RPC.
+        _tx_cache_failed = True
+        return None
+    try:
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS tx_v1 '
+            '(signature TEXT PRIMARY KEY, body BLOB NOT NULL, used_at REAL NOT NULL)'
+        )
+        db.execute('CREATE INDEX IF NOT EXISTS tx_v1_used_at ON tx_v1 (used_at)')
+        # Evict least recently used rows once per process.
+        db.execute(
+            'DELETE FROM tx_v1 WHERE signature IN '
+            '(SELECT signature FROM tx_v1 ORDER BY used_at DESC LIMIT -1 OFFSET ?)',
+            (_TX_CACHE_MAX_ROWS,),
+        )
+        db.commit()
+    except sqlite3.OperationalError:
+        # Usually another worker holding the lock; try again on the next call.
+        db.close()
+        return None
+    except sqlite3.DatabaseError:
+        # Corrupt or not a database at all.
+        db.close()
+        _tx_cache_failed = True
+        return None
+    _tx_cache = db
+    return db
+
+
+def _load_cached_transactions(signatures: list[str]) -> dict[str, dict[str, Any]]:
+    db = _tx_cache_db()
+    if db is None:
+        return {}
+    marks = ','.join('?' * len(signatures))
+    try:
+        rows = db.execute(
+            f'SELECT signature, body, used_at FROM tx_v1 WHERE signature IN ({marks})', signatures
+        ).fetchall()
+        now = time.time()
+        stale = [(now, sig) for sig, _, used_at in rows if used_at < now - _TX_CACHE_TOUCH_S]
+        if stale:
+            db.executemany('UPDATE tx_v1 SET used_at = ? WHERE signature = ?', stale)
+            db.commit()
+    except sqlite3.Error:
+        return {}
+    return {sig: orjson.loads(body) for sig, body, _ in rows}
+
+
+def _store_transactions(transactions: dict[str, dict[str, Any] | None]) -> None:
+    db = _tx_cache_db()
+    if db is None:
+        return
+    now = time.time()
+    rows = [(sig, orjson.dumps(tx), now) for sig, tx in transactions.items() if tx]
+    if not rows:
+        return
+    try:
+        db.executemany('INSERT OR REPLACE INTO tx_v1 (signature, body, used_at) VALUES (?, ?, ?)', rows)
+        db.commit()
+    except sqlite3.Error:
+        pass
+
+
+# concurrent.futures joins _TX_CACHE_EXECUTOR at interpreter exit, so queued
+# writes still land; once that starts, new cache work is skipped.
+async def _cached_transactions(signatures: list[str]) -> dict[str, dict[str, Any]]:
+    if not settings.recon_tx_cache_path or not signatures:
+        return {}
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_TX_CACHE_EXECUTOR, _load_cached_transactions, signatures)
+    except RuntimeError:
+        return {}
+
+
+def _cache_transactions(transactions: dict[str, dict[str, Any] | None]) -> None:
+    # Fire and forget: a report does not wait on its cache writes.
+    if settings.recon_tx_cache_path and transactions:
+        try:
+            _TX_CACHE_EXECUTOR.submit(_store_transactions, transactions)
+        except RuntimeError:
+            pass
+
+
+async def _gather_or_cancel(tasks: list[asyncio.Task[_T]]) -> list[_T]:
+    # gather() leaves siblings running when one task fails; cancel them so a
+    # failed report stops sending requests.
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _rpc_get_transactions_batch(
+    client: httpx.AsyncClient,
+    url: str,
+    signatures: list[str],
+    tracker: _BatchSizeTracker,
+    limiter: asyncio.Semaphore,
 ) -> dict[str, dict[str, Any] | None]:
     results: dict[str, dict[str, Any] | None] = {}
+    cached = await _cached_transactions(signatures)
+    signatures = [sig for sig in signatures if sig not in cached]
     if not signatures:
-        return results
+        return cached
+
+    async def fetch(pending: list[str], parsed: bool) -> None:
+        next_index = 0
+
+        async def worker() -> None:
+            nonlocal next_index
+            while next_index < len(pending):
+                async with limiter:
+                    chunk = pending[next_index : next_index + tracker.get_size()]
+                    if not chunk:
+                        return
+                    next_index += len(chunk)
+                    started_ns = time.perf_counter_ns()
+                    results.update(await _rpc_get_transactions_chunk(client, url, chunk, parsed))
+                    tracker.record(len(chunk), time.perf_counter_ns() - started_ns)
+
+        await _gather_or_cancel(
+            [asyncio.create_task(worker()) for _ in range(min(_TX_CONCURRENCY, len(pending)))]
+        )
 
-    for i in range(0, len(signatures), batch_size):
-        chunk = signatures[i : i + batch_size]
-        payload = [
-            {
-                'jsonrpc': '2.0',
-                'id': idx,
-                'method': 'getTransaction',
-                'params': [sig, {'encoding': 'jsonParsed', 'maxSupportedTransactionVersion': 0}],
-            }
-            for idx, sig in enumerate(chunk, start=1)
-        ]
-
-        last_error: Exception | None = None
-        for attempt in range(4):
-            try:
-                response = client.post(url, json=payload)
-                response.raise_for_status()
-                data = response.json()
-                if not isinstance(data, list):
-                    raise SolanaRPCError('Unexpected batch response format')
-                for item, sig in zip(data, chunk, strict=False):
-                    if isinstance(item, dict) and item.get('error'):
-                        raise SolanaRPCError(str(item['error']))
-                    results[sig] = item.get('result') if isinstance(item, dict) else None
-                break
-            except httpx.HTTPStatusError as exc:
-                if exc.response.status_code in (401, 403, 405, 415):
-                    # Some providers/plans do not accept JSON-RPC batch payloads.
-                    for sig in chunk:
-                        results[sig] = _rpc(
-                            client,
-                            url,
-                            'getTransaction',
-                            [sig, {'encoding': 'jsonParsed', 'maxSupportedTransactionVersion': 0}],
-                        )
-                        time.sleep(0.08)
-                    break
-                if exc.response.status_code == 429:
-                    last_error = exc
-                    if attempt < 3:
-                        time.sleep(0.7 * (attempt + 1))
-                        continue
-                    raise SolanaRateLimitError('Solana RPC rate limited (HTTP 429)') from exc
-                raise SolanaRPCError(f'Solana RPC HTTP error: {exc.response.status_code}') from exc
-            except httpx.HTTPError as exc:
-                last_error = exc
-                if attempt < 3:
-                    time.sleep(0.5 * (attempt + 1))
-                    continue
-                raise SolanaRPCError(f'Solana RPC transport error: {exc}') from exc
-        else:
-            raise SolanaRPCError(f'Solana batch request failed: {last_error}')
+    if settings.solana_two_pass_fetch:
+        # Cheap unparsed pass first; only System Program callers are refetched.
+        await fetch(signatures, parsed=False)
+        await fetch([sig for sig, tx in results.items() if tx is _NEEDS_PARSE], parsed=True)
+    else:
+        await fetch(signatures, parsed=True)
+    _cache_transactions(results)
+    return {**cached, **results}
+
+
+# Reports run on one long-lived event loop so the pooled async clients (and
+# their HTTP/2 connections) survive from one report to the next.
+_LOOP: asyncio.AbstractEventLoop | None = None
+_LOOP_LOCK = Lock()
+_CLIENTS: dict[int, httpx.AsyncClient] = {}
+
+
+def _run(coro: Coroutine[Any, Any, _T]) -> _T:
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            Thread(target=_LOOP.run_forever, name='recon-solana-loop', daemon=True).start()
+            atexit.register(_close_clients)
+    return asyncio.run_coroutine_threadsafe(coro, _LOOP).result()
+
+
+def _get_client(timeout_s: int) -> httpx.AsyncClient:
+    # Only called on _LOOP, so creation needs no lock.
+    client = _CLIENTS.get(timeout_s)
+    if client is None:
+        client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            timeout=timeout_s,
+        )
+        _CLIENTS[timeout_s] = client
+    return client
 
-    return results
+
+async def _aclose_clients() -> None:
+    for client in _CLIENTS.values():
+        await client.aclose()
+    _CLIENTS.clear()
+
+
+def _close_clients() -> None:
+    if _LOOP is not None:
+        asyncio.run_coroutine_threadsafe(_aclose_clients(), _LOOP).result(timeout=5)
+
+
+async def _iter_signature_pages(
+    client: httpx.AsyncClient, url: str, wallet: str, max_signatures: int
+) -> AsyncIterator[list[dict[str, Any]]]:
+    before: str | None = None
+    remaining = max_signatures
+    while remaining > 0:
+        options: dict[str, Any] = {'limit': min(_SIGNATURE_PAGE_SIZE, remaining)}
+        if before:
+            options['before'] = before
+        page = await _rpc(client, url, 'getSignaturesForAddress', [wallet, options]) or []
+        if not page:
+            return
+        yield page
+        remaining -= len(page)
+        before = page[-1].get('signature')
+        if len(page) < options['limit'] or not before:
+            return
 
 
-def _parsed_instructions(tx: dict[str, Any]) -> list[dict[str, Any]]:
-    message = tx.get('transaction', {}).get('message', {})
-    instructions = message.get('instructions') or []
-    parsed = []
-    for ix in instructions:
+async def _fetch_wallet_activity(
+    rpc_url: str, wallet: str, max_signatures: int, timeout_s: int
+) -> tuple[list[tuple[str | None, int | None]], dict[str, dict[str, Any] | None]]:
+    client = _get_client(timeout_s)
+    # (signature, blockTime) per signature entry, read once here so the report
+    # loop does not go back through the signature dicts.
+    signatures: list[tuple[str | None, int | None]] = []
+    transactions: dict[str, dict[str, Any] | None] = {}
+    tracker = _BATCH_TRACKERS.setdefault(rpc_url, _BatchSizeTracker())
+    limiter = asyncio.Semaphore(_TX_CONCURRENCY)
+    # Each page's getTransaction lookups start while the next page of
+    # signatures is still in flight.
+    tasks: list[asyncio.Task[dict[str, dict[str, Any] | None]]] = []
+    try:
+        async for page in _iter_signature_pages(client, rpc_url, wallet, max_signatures):
+            records = [(sig.get('signature'), sig.get('blockTime')) for sig in page]
+            signatures.extend(records)
+            signature_ids = list(dict.fromkeys(sid for sid, _ in records if sid))
+            tasks.append(
+                asyncio.create_task(
+                    _rpc_get_transactions_batch(client, rpc_url, signature_ids, tracker, limiter)
+                )
+            )
+    except BaseException:
+        # A failed signature page: stop the lookups already dispatched.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    for page_transactions in await _gather_or_cancel(tasks):
+        transactions.update(page_transactions)
+    return signatures, transactions
+
+
+_EMPTY: dict[str, Any] = {}
+_FlatInstruction = tuple[str | None, str | None, str | None, int | None]
+
+
+def _walk_tx(tx: dict[str, Any]) -> tuple[list[_FlatInstruction], list[str]]:
+    # One walk of the message per transaction. Instructions are flattened to
+    # (program, source, destination, lamports); lamports is None for anything
+    # that is not a SOL transfer.
+    message = (tx.get('transaction') or _EMPTY).get('message') or _EMPTY
+    _isinstance = isinstance
+    _dict = dict
+    _str = str
+
+    instructions: list[_FlatInstruction] = []
+    for ix in message.get('instructions') or ():
         p = ix.get('parsed')
-        if isinstance(p, dict):
-            parsed.append(p)
-    return parsed
-
-
-def _program_from_instruction(ix: dict[str, Any]) -> str | None:
-    program = ix.get('program')
-    if isinstance(program, str):
-        return program
-    program_id = ix.get('programId')
-    if isinstance(program_id, str):
-        return program_id
-    return None
-
-
-def _account_keys(tx: dict[str, Any]) -> list[str]:
-    keys = tx.get('transaction', {}).get('message', {}).get('accountKeys', [])
-    out: list[str] = []
-    for key in keys:
-        if isinstance(key, str):
-            out.append(key)
-        elif isinstance(key, dict):
+        if not _isinstance(p, _dict):
+            continue
+        program = p.get('program')
+        if not _isinstance(program, _str):
+            program = p.get('programId')
+            if not _isinstance(program, _str):
+                program = None
+        if p.get('type') != 'transfer':
+            instructions.append((program, None, None, None))
+            continue
+        info = p.get('info') or _EMPTY
+        lamports = info.get('lamports')
+        instructions.append(
+            (
+                program,
+                info.get('source'),
+                info.get('destination'),
+                None if lamports is None else int(lamports),
+            )
+        )
+
+    account_keys: list[str] = []
+    for key in message.get('accountKeys') or ():
+        if _isinstance(key, _str):
+            account_keys.append(key)
+        elif _isinstance(key, _dict):
             pubkey = key.get('pubkey')
-            if isinstance(pubkey, str):
-                out.append(pubkey)
-    return out
+            if _isinstance(pubkey, _str):
+                account_keys.append(pubkey)
+    return instructions, account_keys
 
 
 def collect_wallet_report_data(
     rpc_url: str, wallet: str, max_signatures: int, timeout_s: int
 ) -> tuple[dict[str, Any], dict[str, Any]]:
-    counterparties = Counter()
-    linked_wallets = Counter()
+    # Counted with Counter.update, which runs in C; the wallet itself and empty
+    # keys are dropped once after the loop instead of tested per key.
+    linked_wallets: Counter[str] = Counter()
     total_fees_lamports = 0
     inbound_lamports = 0
     outbound_lamports = 0
-    active_days = set()
-    inbound_by_source = Counter()
-    outbound_by_destination = Counter()
-    program_usage = Counter()
-    first_seen: datetime | None = None
-    last_seen: datetime | None = None
-
-    with httpx.Client(timeout=timeout_s) as client:
-        signatures = _rpc(
-            client,
-            rpc_url,
-            'getSignaturesForAddress',
-            [wallet, {'limit': max_signatures}],
-        )
-        signature_ids = [sig.get('signature') for sig in signatures if sig.get('signature')]
-        transactions = _rpc_get_transactions_batch(client, rpc_url, signature_ids)
-
-        for sig in signatures:
-            signature = sig.get('signature')
-            block_time = sig.get('blockTime')
-            if block_time:
-                at = datetime.fromtimestamp(block_time, UTC)
-                day = at.date().isoformat()
-                active_days.add(day)
-                first_seen = at if first_seen is None else min(first_seen, at)
-                last_seen = at if last_seen is None else max(last_seen, at)
-
-            if not signature:
-                continue
+    active_days: set[int] = set()
+    program_usage: defaultdict[str, int] = defaultdict(int)
+    first_block_time: int | None = None
+    last_block_time: int | None = None
+
+    signatures, transactions = _run(
+        _fetch_wallet_activity(rpc_url, wallet, max_signatures, timeout_s)
+    )
 
-            tx = transactions.get(signature)
-            if not tx:
+    # Counterparties are stored column-wise: one row per address, so each
+    # transfer costs a single dict probe. funder_rows/funded_rows keep rows in
+    # first-transfer order so top-K ties break the same way a Counter would.
+    row_of: dict[str, int] = {}
+    addresses: list[str] = []
+    transfer_counts = array('q')
+    inbound_by_row = array('q')
+    outbound_by_row = array('q')
+    directions = bytearray()
+    funder_rows: list[int] = []
+    funded_rows: list[int] = []
+
+    def counterparty_row(address: str) -> int:
+        row = row_of.get(address)
+        if row is None:
+            row = row_of[address] = len(addresses)
+            addresses.append(address)
+            transfer_counts.append(0)
+            inbound_by_row.append(0)
+            outbound_by_row.append(0)
+            directions.append(0)
+        return row
+
+    walk_tx = _walk_tx
+    count_linked = linked_wallets.update
+    for signature, block_time in signatures:
+        if block_time:
+            # UTC day number; datetimes are only built for the first/last seen.
+            active_days.add(block_time // 86400)
+            if first_block_time is None or block_time < first_block_time:
+                first_block_time = block_time
+            if last_block_time is None or block_time > last_block_time:
+                last_block_time = block_time
+
+        if not signature:
+            continue
+
+        tx = transactions.get(signature)
+        if not tx:
+            continue
+
+        fee = tx.get('meta', {}).get('fee') or 0
+        total_fees_lamports += int(fee)
+
+        instructions, account_keys = walk_tx(tx)
+        count_linked(account_keys)
+
+        for program, source, destination, lamports in instructions:
+            if program:
+                program_usage[program] += 1
+            if lamports is None:
                 continue
 
-            fee = tx.get('meta', {}).get('fee') or 0
-            total_fees_lamports += int(fee)
-
-            for k in _account_keys(tx):
-                if k and k != wallet:
-                    linked_wallets[k] += 1
-
-            for parsed in _parsed_instructions(tx):
-                program = _program_from_instruction(parsed)
-                if program:
-                    program_usage[program] += 1
-                if parsed.get('type') != 'transfer':
-                    continue
-                info = parsed.get('info', {})
-                source = info.get('source')
-                destination = info.get('destination')
-                lamports = info.get('lamports')
-                if lamports is None:
-                    continue
-                lamports = int(lamports)
-
-                if source == wallet:
-                    outbound_lamports += lamports
-                    if destination:
-                        counterparties[destination] += 1
-                        outbound_by_destination[destination] += lamports
-                elif destination == wallet:
-                    inbound_lamports += lamports
-                    if source:
-                        counterparties[source] += 1
-                        inbound_by_source[source] += lamports
+            if source == wallet:
+                outbound_lamports += lamports
+                if destination:
+                    row = counterparty_row(destination)
+                    transfer_counts[row] += 1
+                    outbound_by_row[row] += lamports
+                    if not directions[row] & _OUTBOUND:
+                        directions[row] |= _OUTBOUND
+                        funded_rows.append(row)
+            elif destination == wallet:
+                inbound_lamports += lamports
+                if source:
+                    row = counterparty_row(source)
+                    transfer_counts[row] += 1
+                    inbound_by_row[row] += lamports
+                    if not directions[row] & _INBOUND:
+                        directions[row] |= _INBOUND
+                        funder_rows.append(row)
+
+    linked_wallets.pop(wallet, None)
+    linked_wallets.pop('', None)
 
     top_counterparties = [
-        {'wallet': cp, 'transfers': count}
-        for cp, count in counterparties.most_common(8)
+        {'wallet': addresses[row], 'transfers': transfer_counts[row]}
+        for row in nlargest(8, range(len(addresses)), key=transfer_counts.__getitem__)
     ]
 
     total_fees_sol = total_fees_lamports / LAMPORTS_PER_SOL
@@ -241,30 +684,34 @@ def collect_wallet_report_data(
         'top_counterparties': top_counterparties,
     }
     intelligence = {
-        'first_seen_at': first_seen.isoformat() if first_seen else None,
-        'last_seen_at': last_seen.isoformat() if last_seen else None,
-        'unique_counterparties': len(counterparties),
+        'first_seen_at': (
+            datetime.fromtimestamp(first_block_time, UTC).isoformat() if first_block_time else None
+        ),
+        'last_seen_at': (
+            datetime.fromtimestamp(last_block_time, UTC).isoformat() if last_block_time else None
+        ),
+        'unique_counterparties': len(addresses),
         'likely_funders': [
             {
-                'wallet': w,
-                'total_sol': round(l / LAMPORTS_PER_SOL, 6),
-                'transfers': counterparties[w],
+                'wallet': addresses[row],
+                'total_sol': round(inbound_by_row[row] / LAMPORTS_PER_SOL, 6),
+                'transfers': transfer_counts[row],
             }
-            for w, l in inbound_by_source.most_common(10)
+            for row in nlargest(10, funder_rows, key=inbound_by_row.__getitem__)
         ],
         'likely_funded_wallets': [
             {
-                'wallet': w,
-                'total_sol': round(l / LAMPORTS_PER_SOL, 6),
-                'transfers': counterparties[w],
+                'wallet': addresses[row],
+                'total_sol': round(outbound_by_row[row] / LAMPORTS_PER_SOL, 6),
+                'transfers': transfer_counts[row],
             }
-            for w, l in outbound_by_destination.most_common(10)
+            for row in nlargest(10, funded_rows, key=outbound_by_row.__getitem__)
         ],
         'frequent_programs': [
             {'program': p, 'interactions': c}
-            for p, c in program_usage.most_common(10)
+            for p, c in nlargest(10, program_usage.items(), key=_count)
         ],
-        'linked_wallets': [w for w, _ in linked_wallets.most_common(20)],
+        'linked_wallets': [w for w, _ in nlargest(20, linked_wallets.items(), key=_count)],
         'known_labels': [],
         'inferred_entities': [],
     }
@@ -272,17 +719,10 @@ def collect_wallet_report_data(
     # Known label enrichment from linked/program/counterparty addresses.
     candidate_addresses = set(linked_wallets.keys())
     candidate_addresses.update(program_usage.keys())
-    candidate_addresses.update(counterparties.keys())
+    candidate_addresses.update(addresses)
     known_labels = []
-    seen_labels = set()
-    for address in candidate_addresses:
-        meta = KNOWN_ADDRESS_LABELS.get(address)
-        if not meta:
-            continue
-        label, category = meta
-        if address in seen_labels:
-            continue
-        seen_labels.add(address)
+    for address in candidate_addresses & _KNOWN_ADDRESSES:
+        label, category = KNOWN_ADDRESS_LABELS[address]
         known_labels.append({'address': address, 'label': label, 'category': category})
     intelligence['known_labels'] = known_labels
 
@@ -291,7 +731,7 @@ def collect_wallet_report_data(
     axm_wallets = {
         w
         for w in candidate_addresses
-        if isinstance(w, str) and w.lower().startswith('axm')
+        if isinstance(w, str) and w[:3].lower() == 'axm'
     }
     axiom_labels = [l for l in known_labels if l['category'] == 'axiom']
     if axm_wallets or axiom_labels:
@@ -1,3 +1,7 @@
+import atexit
+from functools import lru_cache
+from threading import Lock
+import time
 from typing import Any
 from urllib.parse import unquote
 
@@ -13,6 +17,53 @@ class XSearchError(RuntimeError):
         self.detail = detail
 
 
+# Pooled per timeout so searches reuse TLS connections to the X API.
+_CLIENTS: dict[int, httpx.Client] = {}
+_CLIENTS_LOCK = Lock()
+
+
+def _get_client(timeout_s: int) -> httpx.Client:
+    client = _CLIENTS.get(timeout_s)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(timeout_s)
+            if client is None:
+                client = httpx.Client(
+                    timeout=timeout_s,
+                    http2=True,
+                    limits=httpx.Limits(max_keepalive_connections=32),
+                )
+                _CLIENTS[timeout_s] = client
+    return client
+
+
+def _close_clients() -> None:
+    for client in _CLIENTS.values():
+        client.close()
+
+
+atexit.register(_close_clients)
+
+
+# Recent search rejects longer queries; catch them before the round trip.
+_MAX_QUERY_LENGTH = 512
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+@lru_cache(maxsize=256)
+def _build_query(terms: tuple[str, ...]) -> str:
+    query = ' OR '.join(_quote(term) for term in terms)
+    if len(query) > _MAX_QUERY_LENGTH:
+        raise XSearchError(
+            status_code=400,
+            detail=f'X search query is {len(query)} chars; the limit is {_MAX_QUERY_LENGTH}',
+        )
+    return query
+
+
 def _clean_bearer_token(raw: str) -> str:
     token = unquote(raw.strip()).strip('"').strip("'")
     if token.lower().startswith('bearer '):
@@ -21,7 +72,11 @@ def _clean_bearer_token(raw: str) -> str:
 
 
 def search_x_mentions(
-    bearer_token: str, query_terms: list[str], timeout_s: int, max_results: int = 10
+    bearer_token: str,
+    query_terms: list[str],
+    timeout_s: int,
+    max_results: int = 10,
+    deadline_s: float | None = None,
 ) -> SocialIntel:
     token = _clean_bearer_token(bearer_token)
     if not token:
@@ -30,7 +85,7 @@ def search_x_mentions(
     if not terms:
         return SocialIntel(query_terms=[], total_results=0, mentions=[])
 
-    query = ' OR '.join(f'"{term}"' for term in terms[:5])
+    query = _build_query(tuple(terms[:5]))
     headers = {
         'Authorization': f'Bearer {token}',
         'Accept': 'application/json',
@@ -44,19 +99,40 @@ def search_x_mentions(
         'user.fields': 'username,name',
     }
 
-    with httpx.Client(timeout=timeout_s) as client:
-        resp = client.get(
-            'https://api.x.com/2/tweets/search/recent',
-            headers=headers,
-            params=params,
-        )
-        if resp.status_code in {401, 403}:
-            # Some apps still use api.twitter.com hostnames in credential policy.
-            resp = client.get(
-                'https://api.twitter.com/2/tweets/search/recent',
-                headers=headers,
-                params=params,
+    client = _get_client(timeout_s)
+    # deadline_s bounds the whole search (every page and host retry), where
+    # timeout_s only bounds each network operation.
+    deadline = None if deadline_s is None else time.monotonic() + deadline_s
+
+    def get(url: str, page_params: dict[str, Any]) -> httpx.Response:
+        if deadline is None:
+            return client.get(url, headers=headers, params=page_params)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f'X search exceeded {deadline_s}s')
+        try:
+            return client.get(
+                url, headers=headers, params=page_params, timeout=min(timeout_s, remaining)
             )
+        except httpx.TimeoutException as exc:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f'X search exceeded {deadline_s}s') from exc
+            raise
+
+    search_url = 'https://api.x.com/2/tweets/search/recent'
+    names_by_id: dict[str, tuple[str | None, str | None]] = {}
+    tweets: list[dict[str, Any]] = []
+    seen_ids: set[str] = set()
+    next_token: str | None = None
+    # Recent search caps pages at 100 tweets and pages by cursor, so larger
+    # requests walk next_token one page at a time.
+    for _ in range(-(-max_results // 100)):
+        page_params = {**params, 'next_token': next_token} if next_token else params
+        resp = get(search_url, page_params)
+        if resp.status_code in {401, 403} and search_url.startswith('https://api.x.com'):
+            # Some apps still use api.twitter.com hostnames in credential policy.
+            search_url = 'https://api.twitter.com/2/tweets/search/recent'
+            resp = get(search_url, page_params)
         if resp.status_code >= 400:
             body_preview = resp.text[:220].replace('\n', ' ')
             raise XSearchError(
@@ -65,26 +141,33 @@ def search_x_mentions(
             )
         payload: dict[str, Any] = resp.json()
 
-    user_by_id: dict[str, dict[str, Any]] = {}
-    includes = payload.get('includes', {})
-    for user in includes.get('users', []):
-        uid = user.get('id')
-        if uid:
-            user_by_id[uid] = user
-
-    mentions: list[SocialMention] = []
-    for tweet in payload.get('data', [])[:max_results]:
-        uid = tweet.get('author_id')
-        user = user_by_id.get(uid, {})
-        username = user.get('username')
-        mentions.append(
-            SocialMention(
-                username=username,
-                name=user.get('name'),
-                text=tweet.get('text', ''),
-                created_at=tweet.get('created_at'),
-                url=f'https://x.com/{username}/status/{tweet.get("id")}' if username else None,
-            )
+        includes = payload.get('includes', {})
+        for user in includes.get('users', []):
+            uid = user.get('id')
+            if uid:
+                names_by_id[uid] = (user.get('username'), user.get('name'))
+        for tweet in payload.get('data', []):
+            tweet_id = tweet.get('id')
+            if tweet_id is not None:
+                if tweet_id in seen_ids:
+                    continue
+                seen_ids.add(tweet_id)
+            tweets.append(tweet)
+
+        next_token = payload.get('meta', {}).get('next_token')
+        if not next_token or len(tweets) >= max_results:
+            break
+
+    no_names: tuple[str | None, str | None] = (None, None)
+    mentions = [
+        SocialMention(
+            username=(names := names_by_id.get(tweet.get('author_id'), no_names))[0],
+            name=names[1],
+            text=tweet.get('text', ''),
+            created_at=tweet.get('created_at'),
+            url=f'https://x.com/{names[0]}/status/{tweet.get("id")}' if names[0] else None,
         )
+        for tweet in tweets[:max_results]
+    ]
 
     return SocialIntel(query_terms=terms[:5], total_results=len(mentions), mentions=mentions)